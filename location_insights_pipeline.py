@@ -1,17 +1,19 @@
-import random
 from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import product
 
 import numpy as np
 import pandas as pd
 import geopandas as gpd
 from shapely.geometry import Point
-from sklearn.cluster import DBSCAN
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
 
 import folium
 from folium.plugins import HeatMap
 
-random.seed(42)
-np.random.seed(42)
+rng = np.random.default_rng(42)
 
 NUM_USERS = 500
 
@@ -38,37 +40,36 @@ CITIES = [
     ("Visakhapatnam", 17.6868, 83.2185),
 ]
 
+CITY_NAMES = np.array([name for name, _, _ in CITIES])
+CITY_COORDS = np.array([(lat, lon) for _, lat, lon in CITIES])
+
 TIMEZONE = "Asia/Kolkata" 
 
 TODAY = datetime.now()
 START_DATE = TODAY - timedelta(days=60)
 
+NS_PER_MINUTE = 60 * 1_000_000_000
+NS_PER_HOUR = 60 * NS_PER_MINUTE
+NS_PER_DAY = 24 * NS_PER_HOUR
+
 # 2. GENERATE MOCK USER DATA (500 users across 20 cities)
 
 def generate_users(num_users=NUM_USERS):
     user_ids = [f"U{str(i).zfill(4)}" for i in range(1, num_users + 1)]
 
-    city_choices = np.random.choice(len(CITIES), size=num_users, replace=True)
-
-    cities = []
-    lats = []
-    lons = []
-    timezones = []
+    city_choices = rng.integers(len(CITIES), size=num_users)
 
-    for idx in city_choices:
-        name, lat, lon = CITIES[idx]
-        cities.append(name)
-        lats.append(lat + np.random.normal(0, 0.05))
-        lons.append(lon + np.random.normal(0, 0.05))
-        timezones.append(TIMEZONE)
+    cities = CITY_NAMES[city_choices]
+    coords = CITY_COORDS[city_choices] + rng.normal(0, 0.05, size=(num_users, 2))
+    timezones = np.full(num_users, TIMEZONE)
 
-    match_success = np.clip(np.random.normal(0.6, 0.15, size=num_users), 0, 1)
+    match_success = np.clip(rng.normal(0.6, 0.15, size=num_users), 0, 1)
 
     users_df = pd.DataFrame({
         "user_id": user_ids,
         "city": cities,
-        "lat": lats,
-        "lon": lons,
+        "lat": coords[:, 0],
+        "lon": coords[:, 1],
         "timezone": timezones,
         "user_match_success": match_success,
     })
@@ -78,8 +79,8 @@ def generate_users(num_users=NUM_USERS):
 
 users_df = generate_users()
 
-users_df.to_csv("users_geo.csv", index=False)
-print("Saved users_geo.csv")
+users_df.to_parquet("users_geo.parquet", engine="pyarrow", compression="zstd", index=False)
+print("Saved users_geo.parquet")
 
 # 3. GENERATE MOCK BEHAVIORAL EVENTS
 
@@ -88,101 +89,476 @@ def generate_events(users_df, min_events=10, max_events=40):
     For each user, generate [min_events, max_events] events between START_DATE and TODAY.
     Events biased toward evenings and weekends.
     """
-    events = []
-
-    for _, row in users_df.iterrows():
-        user_id = row["user_id"]
-        city = row["city"]
-        lat = row["lat"]
-        lon = row["lon"]
-
-        num_events = random.randint(min_events, max_events)
-        for _ in range(num_events):
-            days_offset = random.randint(0, (TODAY - START_DATE).days)
-            base_date = START_DATE + timedelta(days=days_offset)
-
-            if random.random() < 0.7:
-                hour = random.randint(17, 23)
-            else:
-                hour = random.randint(8, 23)
-
-            minute = random.randint(0, 59)
-            event_time = base_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-
-            weekday = event_time.weekday()  
-            is_weekend = 1 if weekday >= 5 else 0
-
-            events.append({
-                "user_id": user_id,
-                "city": city,
-                "lat": lat + np.random.normal(0, 0.01),
-                "lon": lon + np.random.normal(0, 0.01),
-                "event_time": event_time,
-                "hour": hour,
-                "weekday": weekday,
-                "is_weekend": is_weekend,
-            })
-
-    events_df = pd.DataFrame(events)
+    num_events = rng.integers(min_events, max_events + 1, size=len(users_df))
+    total = num_events.sum()
+
+    user_ids = np.repeat(users_df["user_id"].to_numpy(), num_events)
+    cities = np.repeat(users_df["city"].to_numpy(), num_events)
+    coords = np.repeat(users_df[["lat", "lon"]].to_numpy(), num_events, axis=0)
+
+    days_offset = rng.integers(0, (TODAY - START_DATE).days + 1, size=total)
+    hours = np.where(
+        rng.random(total) < 0.7,
+        rng.integers(17, 24, size=total),
+        rng.integers(8, 24, size=total),
+    )
+    minutes = rng.integers(0, 60, size=total)
+    coords += rng.normal(0, 0.01, size=(total, 2))
+
+    # Timestamps as int64 nanoseconds since the epoch; 1970-01-01 was a Thursday (weekday 3)
+    start_day = pd.Timestamp(START_DATE).normalize().value // NS_PER_DAY
+    event_days = start_day + days_offset
+    event_time = (
+        event_days * NS_PER_DAY + hours * NS_PER_HOUR + minutes * NS_PER_MINUTE
+    ).view("datetime64[ns]")
+    weekdays = (event_days + 3) % 7
+
+    events_df = pd.DataFrame({
+        "user_id": user_ids,
+        "city": cities,
+        "lat": coords[:, 0],
+        "lon": coords[:, 1],
+        "event_time": event_time,
+        "hour": hours,
+        "weekday": weekdays,
+        "is_weekend": weekdays >= 5,
+    })
+
+    # Low-cardinality keys as categoricals and small ints keep the frame compact and groupbys fast
+    events_df = events_df.astype({
+        "user_id": "category",
+        "city": "category",
+        "hour": "int8",
+        "weekday": "int8",
+        "is_weekend": "int8",
+    })
+
     return events_df
 
 
 events_df = generate_events(users_df)
-events_df.to_csv("events_geo.csv", index=False)
-print("Saved events_geo.csv")
+events_df.to_parquet("events_geo.parquet", engine="pyarrow", compression="zstd", index=False)
+print("Saved events_geo.parquet")
 
 # 4. GEOGRAPHIC DISTRIBUTION ANALYSIS
 
-users_per_city = users_df.groupby("city").agg(
+# Mean coordinates ride along in the same groupby for the map's city markers (section 7)
+users_per_city = users_df.groupby("city", sort=False).agg(
     users=("user_id", "nunique"),
     avg_user_match_success=("user_match_success", "mean"),
+    mean_lat=("lat", "mean"),
+    mean_lon=("lon", "mean"),
 ).reset_index()
 
 print("\n=== Users per City & Avg User Match Success ===")
-print(users_per_city.sort_values("users", ascending=False))
+print(users_per_city[["city", "users", "avg_user_match_success"]].sort_values("users", ascending=False))
 
 # 5. BEHAVIORAL HEATMAP: PEAK USAGE TIMES
 
-hourly_pivot = events_df.pivot_table(
-    index="hour",
-    columns="weekday",
-    values="user_id",
-    aggfunc="count",
-    fill_value=0,
-)
+# hour and weekday are small bounded ints, so one bincount over a flat index builds the pivot
+hour_weekday_counts = np.bincount(
+    events_df["hour"].to_numpy(np.intp) * 7 + events_df["weekday"].to_numpy(np.intp),
+    minlength=24 * 7,
+).reshape(24, 7)
 
-hourly_pivot.columns = [f"weekday_{c}" for c in hourly_pivot.columns]
+hourly_counts = hour_weekday_counts.sum(axis=1)
+weekday_counts = hour_weekday_counts.sum(axis=0)
+
+# Keep only the hours and weekdays that actually have events
+hourly_pivot = pd.DataFrame(
+    hour_weekday_counts[hourly_counts > 0][:, weekday_counts > 0],
+    index=pd.Index(np.flatnonzero(hourly_counts), name="hour"),
+    columns=[f"weekday_{c}" for c in np.flatnonzero(weekday_counts)],
+)
 
 print("\n=== Hourly Usage Heatmap (hour x weekday) ===")
 print(hourly_pivot)
 
-hourly_counts = events_df.groupby("hour")["user_id"].count()
-peak_hour = hourly_counts.idxmax()
+peak_hour = hourly_counts.argmax()
 print(f"\nPeak usage hour (overall): {peak_hour}:00")
 
-weekend_stats = events_df.groupby("is_weekend")["user_id"].count().rename({0: "weekday", 1: "weekend"})
+weekend_stats = pd.Series(
+    np.bincount(events_df["is_weekend"].to_numpy(), minlength=2),
+    index=pd.Index(["weekday", "weekend"], name="is_weekend"),
+    name="events",
+)
 print("\n=== Weekend vs Weekday Events ===")
 print(weekend_stats)
 
 # 6. DBSCAN CLUSTERING FOR GEOGRAPHIC HOTSPOTS
 
-coords = events_df[["lat", "lon"]].values
+def build_grid(coords, eps):
+    """
+    Bucket points into cells with a diagonal of eps.
+    Returns the point order that groups cells contiguously, plus each cell's
+    integer coordinates, start offset and size in that order.
+    """
+    n, dim = coords.shape
+    cells = np.floor(coords / (eps / np.sqrt(dim))).astype(np.int64)
+    order = np.lexsort(cells.T[::-1])
+    sorted_cells = cells[order]
+
+    # Rows are lexsorted, so each cell starts wherever the row differs from the previous one
+    new_cell = np.ones(n, dtype=bool)
+    new_cell[1:] = (sorted_cells[1:] != sorted_cells[:-1]).any(axis=1)
+    starts = np.flatnonzero(new_cell)
+    sizes = np.diff(np.append(starts, n))
+
+    return order, sorted_cells[starts], starts, sizes
 
-dbscan = DBSCAN(eps=0.5, min_samples=30, metric="euclidean")
-cluster_labels = dbscan.fit_predict(coords)
+
+def grid_cell_pairs(cells):
+    """
+    Return every pair (a, b), a < b, of occupied cells that can hold points within
+    eps of each other. cells must be unique and lexsorted, as from build_grid.
+    """
+    num_cells, dim = cells.shape
+
+    # A neighbor can be up to ceil(sqrt(dim)) cells away along an axis; keep only the
+    # offsets whose nearest cell corner is within eps, and only the lexicographically
+    # positive half so each pair is found once, from its lower cell
+    reach = int(np.ceil(np.sqrt(dim)))
+    offsets = np.array([
+        offset for offset in product(range(-reach, reach + 1), repeat=dim)
+        if offset > (0,) * dim and sum(max(abs(k) - 1, 0) ** 2 for k in offset) < dim
+    ], dtype=np.int64).reshape(-1, dim)
+
+    # Row-major int64 keys, padded by reach on every side so shifted cells never wrap;
+    # the keys then sort exactly like the lexsorted cells
+    shifted = cells - cells.min(axis=0) + reach
+    extent = shifted.max(axis=0) + reach + 1
+    if np.prod(extent.astype(float)) >= 2 ** 62:
+        raise ValueError("grid too fine to index with int64 keys; increase eps")
+    strides = np.append(np.cumprod(extent[:0:-1])[::-1], 1)
+    keys = shifted @ strides
+
+    cell_ids = np.arange(num_cells)
+    pairs = []
+    for offset_key in offsets @ strides:
+        targets = keys + offset_key
+        b = np.minimum(np.searchsorted(keys, targets), num_cells - 1)
+        found = keys[b] == targets
+        pairs.append(np.column_stack([cell_ids[found], b[found]]))
+
+    return np.concatenate(pairs).reshape(-1, 2)
+
+
+DENSE_BLOCK_PAIRS = 4096
+PAIR_BATCH_SIZE = 1 << 20
+
+
+def grid_neighbor_search_numpy(points, starts, sizes, cell_pairs, eps, min_samples):
+    """
+    Neighbor search over cell-sorted points with vectorized NumPy distance checks.
+    Returns the core mask, which cell pairs have core points within eps of each other,
+    and for each point a neighboring cell holding a core neighbor (-1 if none).
+    """
+    n = len(points)
+    eps2 = eps ** 2
+    a, b = cell_pairs.T
+    candidates = sizes[a] * sizes[b]
+    dense = candidates >= DENSE_BLOCK_PAIRS
+
+    # Squared distances as |x|^2 + |y|^2 - 2<x, y> so the cross term is a BLAS matmul;
+    # centering first keeps the norms small and limits cancellation error
+    points = points - points.mean(axis=0)
+    sq_norms = np.einsum("ij,ij->i", points, points)
+
+    neighbor_counts = np.repeat(sizes, sizes)
+
+    # Well-filled cell pairs: one distance block each
+    blocks = []
+    for p in np.flatnonzero(dense):
+        span_a = slice(starts[a[p]], starts[a[p]] + sizes[a[p]])
+        span_b = slice(starts[b[p]], starts[b[p]] + sizes[b[p]])
+        gram = points[span_a] @ points[span_b].T
+        close = sq_norms[span_a, None] + sq_norms[None, span_b] - 2 * gram <= eps2
+        blocks.append((p, span_a, span_b, close))
+        neighbor_counts[span_a] += close.sum(axis=1)
+        neighbor_counts[span_b] += close.sum(axis=0)
+
+    # Sparse cell pairs: expand into point pairs and test them in large batches
+    sparse_ids = np.flatnonzero(~dense)
+    cumulative = np.cumsum(candidates[sparse_ids])
+    total = cumulative[-1] if len(cumulative) else 0
+    cuts = np.searchsorted(cumulative, np.arange(PAIR_BATCH_SIZE, total, PAIR_BATCH_SIZE))
+    close_pair, close_i, close_j = [], [], []
+    for batch in np.split(sparse_ids, cuts):
+        counts = candidates[batch]
+        pair_of = np.repeat(batch, counts)
+        rank = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        width = sizes[b[pair_of]]
+        i = starts[a[pair_of]] + rank // width
+        j = starts[b[pair_of]] + rank % width
+        diff = points[i] - points[j]
+        close = np.einsum("ij,ij->i", diff, diff) <= eps2
+        close_pair.append(pair_of[close])
+        close_i.append(i[close])
+        close_j.append(j[close])
+    close_pair = np.concatenate(close_pair)
+    close_i = np.concatenate(close_i)
+    close_j = np.concatenate(close_j)
+    neighbor_counts += np.bincount(close_i, minlength=n) + np.bincount(close_j, minlength=n)
+
+    core = neighbor_counts >= min_samples
+
+    linked = np.zeros(len(cell_pairs), dtype=bool)
+    border_cell = np.full(n, -1)
+
+    linked[close_pair[core[close_i] & core[close_j]]] = True
+    for src, dst, dst_cell in ((close_i, close_j, b), (close_j, close_i, a)):
+        reach = ~core[src] & core[dst]
+        border_cell[src[reach]] = dst_cell[close_pair[reach]]
+
+    for p, span_a, span_b, close in blocks:
+        linked[p] = close[np.ix_(core[span_a], core[span_b])].any()
+        for src, dst, dst_cell, block in ((span_a, span_b, b[p], close), (span_b, span_a, a[p], close.T)):
+            reach = block[:, core[dst]].any(axis=1) & ~core[src]
+            border_cell[src][reach] = dst_cell
+
+    return core, linked, border_cell
+
+
+@lru_cache(maxsize=None)
+def compile_numba_kernels():
+    """
+    Import numba and build the grid search kernels on first use.
+    Returns None when numba is not installed.
+    """
+    try:
+        from numba import njit, prange
+    except ImportError:  # numba is optional; the NumPy search is used instead
+        return None
+
+    @njit(inline="always")
+    def within(points, i, j, eps2):
+        dist2 = 0.0
+        for k in range(points.shape[1]):
+            delta = points[i, k] - points[j, k]
+            dist2 += delta * delta
+        return dist2 <= eps2
+
+    @njit(parallel=True, fastmath=True)
+    def count_neighbors(points, starts, sizes, cell_of, adj_ptr, adj_cells, eps2):
+        n = points.shape[0]
+        counts = np.empty(n, dtype=np.int64)
+        for i in prange(n):
+            a = cell_of[i]
+            count = sizes[a]
+            for k in range(adj_ptr[a], adj_ptr[a + 1]):
+                b = adj_cells[k]
+                for j in range(starts[b], starts[b] + sizes[b]):
+                    if within(points, i, j, eps2):
+                        count += 1
+            counts[i] = count
+        return counts
+
+    @njit(parallel=True, fastmath=True)
+    def link_cells(points, starts, sizes, cell_pairs, core, eps2):
+        linked = np.zeros(cell_pairs.shape[0], dtype=np.bool_)
+        for p in prange(cell_pairs.shape[0]):
+            a = cell_pairs[p, 0]
+            b = cell_pairs[p, 1]
+            for i in range(starts[a], starts[a] + sizes[a]):
+                if linked[p]:
+                    break
+                if not core[i]:
+                    continue
+                for j in range(starts[b], starts[b] + sizes[b]):
+                    if core[j] and within(points, i, j, eps2):
+                        linked[p] = True
+                        break
+        return linked
+
+    @njit(parallel=True, fastmath=True)
+    def find_border_cells(points, starts, sizes, cell_of, adj_ptr, adj_cells, core, eps2):
+        n = points.shape[0]
+        border_cell = np.full(n, -1, dtype=np.int64)
+        for i in prange(n):
+            if core[i]:
+                continue
+            a = cell_of[i]
+            for k in range(adj_ptr[a], adj_ptr[a + 1]):
+                if border_cell[i] >= 0:
+                    break
+                b = adj_cells[k]
+                for j in range(starts[b], starts[b] + sizes[b]):
+                    if core[j] and within(points, i, j, eps2):
+                        border_cell[i] = b
+                        break
+        return border_cell
+
+    return count_neighbors, link_cells, find_border_cells
+
+
+def grid_neighbor_search_numba(points, starts, sizes, cell_pairs, eps, min_samples):
+    """
+    Same contract as grid_neighbor_search_numpy, computed point by point in
+    compiled parallel kernels without materializing distance blocks.
+    """
+    num_cells = len(sizes)
+    cell_of = np.repeat(np.arange(num_cells), sizes)
+
+    # Cell adjacency in CSR form, both directions of every neighboring pair
+    directed = np.concatenate([cell_pairs, cell_pairs[:, ::-1]])
+    directed = directed[np.argsort(directed[:, 0], kind="stable")]
+    adj_ptr = np.concatenate([[0], np.cumsum(np.bincount(directed[:, 0], minlength=num_cells))])
+    adj_cells = np.ascontiguousarray(directed[:, 1])
+
+    count_neighbors, link_cells, find_border_cells = compile_numba_kernels()
+
+    eps2 = float(eps) ** 2
+    core = count_neighbors(points, starts, sizes, cell_of, adj_ptr, adj_cells, eps2) >= min_samples
+    linked = link_cells(points, starts, sizes, cell_pairs, core, eps2)
+    border_cell = find_border_cells(points, starts, sizes, cell_of, adj_ptr, adj_cells, core, eps2)
+
+    return core, linked, border_cell
+
+
+NUMBA_MIN_POINTS = 200_000
+
+
+def grid_neighbor_search(points, starts, sizes, cell_pairs, eps, min_samples):
+    """
+    Use the compiled kernels only for inputs large enough to repay importing numba
+    and JIT-compiling them (~2 s); below that the NumPy blocks finish sooner.
+    """
+    if len(points) >= NUMBA_MIN_POINTS and compile_numba_kernels() is not None:
+        return grid_neighbor_search_numba(points, starts, sizes, cell_pairs, eps, min_samples)
+    return grid_neighbor_search_numpy(points, starts, sizes, cell_pairs, eps, min_samples)
+
+
+def grid_dbscan(coords, eps, min_samples, grid=None):
+    """
+    DBSCAN using a uniform grid as the neighbor index.
+    Cells have a diagonal of eps, so all points sharing a cell are neighbors and
+    only a small fixed stencil of surrounding cells has to be searched.
+    Pass a precomputed build_grid(coords, eps) as grid to skip rebuilding it.
+    Labels follow sklearn's convention: clusters numbered from 0 in order of their
+    first core point, -1 for noise.
+    """
+    n = len(coords)
+    if grid is None:
+        grid = build_grid(coords, eps)
+    order, cells, starts, sizes = grid
+    num_cells = len(sizes)
+    cell_pairs = grid_cell_pairs(cells)
+
+    points = np.ascontiguousarray(coords[order], dtype=np.float64)
+    core, linked, border_cell = grid_neighbor_search(
+        points, starts, sizes, cell_pairs, eps, min_samples
+    )
+
+    # Core points of a cell are mutually connected, so clusters are components of the cell graph
+    edges = cell_pairs[linked]
+    graph = csr_matrix(
+        (np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])),
+        shape=(num_cells, num_cells),
+    )
+    _, components = connected_components(graph, directed=False)
+
+    # Border points join their own cell's cluster if it has core points, else a neighbor's
+    cell_of = np.repeat(np.arange(num_cells), sizes)
+    has_core = np.bincount(cell_of[core], minlength=num_cells) > 0
+    home = np.where(has_core[cell_of], cell_of, border_cell)
+    sorted_component = np.where(core | (home >= 0), components[home], -1)
+
+    point_component = np.empty(n, dtype=np.int64)
+    point_component[order] = sorted_component
+    is_core = np.empty(n, dtype=bool)
+    is_core[order] = core
+
+    return label_clusters(point_component, is_core)
+
+
+def kdtree_dbscan(coords, eps, min_samples):
+    """
+    DBSCAN from a single cKDTree self-join of all point pairs within eps.
+    Cheapest when neighborhoods are small, since every pair is materialized.
+    """
+    n = len(coords)
+    i, j = cKDTree(coords).query_pairs(r=eps, output_type="ndarray").T
+
+    # A point counts itself as a neighbor, as in sklearn
+    core = np.bincount(np.concatenate([i, j]), minlength=n) + 1 >= min_samples
+
+    core_pairs = core[i] & core[j]
+    graph = csr_matrix(
+        (np.ones(core_pairs.sum(), dtype=np.int8), (i[core_pairs], j[core_pairs])),
+        shape=(n, n),
+    )
+    _, components = connected_components(graph, directed=False)
+
+    # Border points join the cluster of a core neighbor
+    point_component = np.where(core, components, -1)
+    for src, dst in ((i, j), (j, i)):
+        border = ~core[src] & core[dst]
+        point_component[src[border]] = components[dst[border]]
+
+    return label_clusters(point_component, core)
+
+
+def label_clusters(point_component, is_core):
+    """
+    Turn per-point component ids (-1 for noise) into sklearn-style labels,
+    numbering clusters from 0 in order of their first core point.
+    """
+    labels = np.full(len(point_component), -1)
+    found, first = np.unique(point_component[is_core], return_index=True)
+    rank = np.full(point_component.max() + 1, -1)
+    rank[found] = np.argsort(np.argsort(first))
+    clustered = point_component >= 0
+    labels[clustered] = rank[point_component[clustered]]
+    return labels
+
+
+KDTREE_MAX_CELL_OCCUPANCY = 16
+
+
+def dbscan(coords, eps, min_samples):
+    """
+    Pick the cheaper DBSCAN backend for the data at hand.
+    The kd-tree self-join materializes every pair within eps, a list that grows with
+    n times the grid cell occupancy: it wins while cells are sparsely filled, and the
+    grid is far faster once dense hotspots pack many points into each cell.
+    """
+    grid = build_grid(coords, eps)
+    sizes = grid[3]
+    # Mean number of points sharing a point's grid cell, a lower bound on its neighbor count
+    occupancy = (sizes ** 2).sum() / len(coords)
+    if occupancy < KDTREE_MAX_CELL_OCCUPANCY:
+        return kdtree_dbscan(coords, eps, min_samples)
+    return grid_dbscan(coords, eps, min_samples, grid=grid)
+
+
+EARTH_RADIUS_KM = 6371.0
+CLUSTER_RADIUS_KM = 50.0
+
+# Cluster on the unit sphere: chord length grows monotonically with great-circle
+# distance, so a chord-length eps gives exactly the haversine neighborhoods.
+lat_rad, lon_rad = np.radians(events_df[["lat", "lon"]].to_numpy()).T
+coords = np.column_stack([
+    np.cos(lat_rad) * np.cos(lon_rad),
+    np.cos(lat_rad) * np.sin(lon_rad),
+    np.sin(lat_rad),
+])
+chord_eps = 2 * np.sin(CLUSTER_RADIUS_KM / EARTH_RADIUS_KM / 2)
+
+cluster_labels = dbscan(coords, eps=chord_eps, min_samples=30)
 
 events_df["cluster"] = cluster_labels
+clustered = cluster_labels >= 0
 
 cluster_summary = (
-    events_df[events_df["cluster"] >= 0]
-    .groupby("cluster")
+    events_df.loc[clustered]
+    .groupby("cluster", sort=False)
     .agg(
         events=("user_id", "count"),
         avg_lat=("lat", "mean"),
         avg_lon=("lon", "mean"),
     )
     .reset_index()
-    .sort_values("events", ascending=False)
+    .sort_values("events", ascending=False, kind="stable")
 )
 
 print("\n=== Geographic Hotspot Clusters (DBSCAN) ===")
@@ -193,35 +569,41 @@ print(cluster_summary)
 india_center = [20.5937, 78.9629]
 m = folium.Map(location=india_center, zoom_start=5)
 
-for _, row in users_per_city.iterrows():
-    city = row["city"]
-    city_users = users_df[users_df["city"] == city]
-    mean_lat = city_users["lat"].mean()
-    mean_lon = city_users["lon"].mean()
-    user_count = row["users"]
-
+# Grouping the markers lets Leaflet insert them as a single layer
+city_layer = folium.FeatureGroup(name="Cities")
+for row in users_per_city.itertuples(index=False):
     folium.CircleMarker(
-        location=[mean_lat, mean_lon],
-        radius=4 + user_count / 30, 
-        popup=f"{city}: {user_count} users",
-        tooltip=f"{city}: {user_count} users",
+        location=[row.mean_lat, row.mean_lon],
+        radius=4 + row.users / 30,
+        popup=f"{row.city}: {row.users} users",
+        tooltip=f"{row.city}: {row.users} users",
         fill=True,
         fill_opacity=0.7,
-    ).add_to(m)
+    ).add_to(city_layer)
+city_layer.add_to(m)
 
 # 7.2 Heatmap of events (density)
-heat_data = events_df[["lat", "lon"]].dropna().values.tolist()
+# Snap events to a 0.05 degree (~5 km) grid, below the map's resolution at zoom 5,
+# and send one weighted point per cell; Leaflet.heat sums the weights per pixel anyway
+heat_cells, heat_counts = np.unique(
+    np.round(events_df[["lat", "lon"]].dropna().to_numpy() * 20) / 20,
+    axis=0,
+    return_counts=True,
+)
+heat_data = np.column_stack([heat_cells, heat_counts])
 HeatMap(heat_data, radius=10, blur=15).add_to(m)
 
 # 7.3 Mark cluster centers for hotspots
-for _, row in cluster_summary.iterrows():
+cluster_layer = folium.FeatureGroup(name="Hotspot clusters")
+for row in cluster_summary.itertuples(index=False):
     folium.Circle(
-        location=[row["avg_lat"], row["avg_lon"]],
-        radius=50000,  
-        popup=f"Cluster {row['cluster']} - {row['events']} events",
-        tooltip=f"Hotspot Cluster {row['cluster']}",
+        location=[row.avg_lat, row.avg_lon],
+        radius=CLUSTER_RADIUS_KM * 1000,
+        popup=f"Cluster {row.cluster} - {row.events} events",
+        tooltip=f"Hotspot Cluster {row.cluster}",
         fill=False,
-    ).add_to(m)
+    ).add_to(cluster_layer)
+cluster_layer.add_to(m)
 
 # Save HTML map
 MAP_FILENAME = "user_distribution_map.html"
@@ -234,22 +616,19 @@ print(f"\nSaved interactive map to {MAP_FILENAME}")
 #  - users per city
 #  - aggregated events per city
 #  - avg match success
-events_per_city = events_df.groupby("city")["user_id"].count().rename("events")
+events_per_city = events_df.groupby("city", sort=False, observed=True).agg(events=("user_id", "size"))
 city_metrics = users_per_city.merge(events_per_city, on="city")
 
-for col in ["users", "events", "avg_user_match_success"]:
-    col_min = city_metrics[col].min()
-    col_max = city_metrics[col].max()
-    if col_max == col_min:
-        city_metrics[f"{col}_norm"] = 0.0
-    else:
-        city_metrics[f"{col}_norm"] = (city_metrics[col] - col_min) / (col_max - col_min)
-
-city_metrics["event_zone_score"] = (
-    0.4 * city_metrics["users_norm"]
-    + 0.4 * city_metrics["events_norm"]
-    + 0.2 * city_metrics["avg_user_match_success_norm"]
-)
+score_columns = ["users", "events", "avg_user_match_success"]
+score_weights = np.array([0.4, 0.4, 0.2])
+
+# Min-max normalize all score columns at once; constant columns normalize to 0
+block = city_metrics[score_columns].to_numpy(dtype=float)
+spread = np.ptp(block, axis=0)
+normalized = (block - block.min(axis=0)) / np.where(spread == 0, 1, spread)
+
+city_metrics[[f"{col}_norm" for col in score_columns]] = normalized
+city_metrics["event_zone_score"] = normalized @ score_weights
 
 top5_cities = city_metrics.sort_values("event_zone_score", ascending=False).head(5)
 